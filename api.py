@@ -10,15 +10,37 @@ Endpoints:
     GET /api/fundamentals    - KOSPI stock fundamentals (PER, PBR, market cap, sector)
 """
 
-from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
-
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import asynccontextmanager, suppress
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import orjson
 import pandas as pd
 import uvicorn
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pykrx import stock
 
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+KST = ZoneInfo("Asia/Seoul")
+# KRX publishes the day's data after the close; matches the update_data workflow schedule
+PUBLISH_HOUR = 18
+# Wait this long after a failed refresh before requests may trigger another one
+REFRESH_RETRY_SECONDS = 300
+# Max serialized /api/fundamentals payloads kept per refresh (each up to ~150 KB)
+PAYLOAD_CACHE_SIZE = 64
+
 
 # ── Cache ─────────────────────────────────────────────────────────────────────
 
@@ -26,16 +48,86 @@ class DataCache:
     def __init__(self):
         self.date: str | None = None
         self.df: pd.DataFrame | None = None
+        self.df_valid: pd.DataFrame | None = None
+        self.sectors: list[str] | None = None
+        # Reentrant: the first load in _get_data holds it while refresh() swaps data in
+        self._lock = threading.RLock()
+        self._refreshing = False
+        self._last_failure: float | None = None
+        # Serialized responses keyed by (date, *query); cleared on every refresh
+        self._payloads: OrderedDict[tuple, bytes] = OrderedDict()
 
     def is_stale(self) -> bool:
-        return self.date != _latest_business_day()
+        return self.date != _latest_business_day(_published_date())
 
     def refresh(self) -> None:
-        date = _latest_business_day()
-        print(f"Fetching KOSPI data for {date}...")
-        self.df = _fetch(date)
-        self.date = date
-        print(f"Cache refreshed: {len(self.df)} stocks loaded.")
+        day = _latest_business_day(_published_date())
+        df = _load(day)
+        # Stocks with valid PER/PBR, by market cap descending (the default order)
+        df_valid = (
+            df[(df["PER"] > 0) & (df["PBR"] > 0)]
+            .sort_values("시가총액(억)", ascending=False)
+            .reset_index(drop=True)
+        )
+        sectors = sorted(df["섹터"].dropna().unique().tolist())
+
+        # Swap everything in together so readers never mix old and new data
+        with self._lock:
+            self.df, self.df_valid, self.sectors, self.date = df, df_valid, sectors, day
+            self._payloads.clear()
+        print(f"Cache refreshed: {len(df)} stocks loaded.")
+
+    def cached_payload(self, key: tuple, build: Callable[[str, pd.DataFrame], bytes]) -> bytes:
+        """
+        Return build(date, df_valid), memoized per (date, *key) in a bounded LRU.
+        date and df_valid always come from the same refresh.
+        """
+        with self._lock:
+            day, df_valid = self.date, self.df_valid
+            full_key = (day, *key)
+            payload = self._payloads.get(full_key)
+            if payload is not None:
+                self._payloads.move_to_end(full_key)
+                return payload
+
+        payload = build(day, df_valid)
+        with self._lock:
+            # Skip storing if a refresh swapped in new data while we were building
+            if self.date == day:
+                self._payloads[full_key] = payload
+                if len(self._payloads) > PAYLOAD_CACHE_SIZE:
+                    self._payloads.popitem(last=False)
+        return payload
+
+    def claim_refresh(self, backoff: bool = True) -> bool:
+        """
+        Mark a refresh as started if the cache is stale and no other refresh is running.
+        With backoff, also wait REFRESH_RETRY_SECONDS after a failed attempt.
+        Whoever gets True must call run_claimed_refresh().
+        """
+        with self._lock:
+            if self._refreshing or not self.is_stale():
+                return False
+            if backoff and self._last_failure is not None:
+                if time.monotonic() - self._last_failure < REFRESH_RETRY_SECONDS:
+                    return False
+            self._refreshing = True
+            return True
+
+    def run_claimed_refresh(self) -> None:
+        try:
+            self.refresh()
+            self._last_failure = None
+        except Exception as e:
+            self._last_failure = time.monotonic()
+            print(f"Cache refresh failed, serving data for {self.date}: {e}")
+        finally:
+            self._refreshing = False
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh thread unless one is already running; callers keep the current data."""
+        if self.claim_refresh():
+            threading.Thread(target=self.run_claimed_refresh, daemon=True).start()
 
 
 _cache = DataCache()
@@ -43,43 +135,145 @@ _cache = DataCache()
 
 # ── Data helpers ──────────────────────────────────────────────────────────────
 
-def _latest_business_day() -> str:
-    d = datetime.today()
+def _published_date() -> date:
+    """Latest calendar date whose KRX data is out: today after PUBLISH_HOUR KST, else yesterday."""
+    return (datetime.now(KST) - timedelta(hours=PUBLISH_HOUR)).date()
+
+
+@lru_cache(maxsize=8)
+def _latest_business_day(today: date) -> str:
+    d = today
     while d.weekday() >= 5:
         d -= timedelta(days=1)
     return d.strftime("%Y%m%d")
 
 
-def _fetch(date: str) -> pd.DataFrame:
-    df_sector = stock.get_market_sector_classifications(date, market="KOSPI")
-    df_fund = stock.get_market_fundamental(date, market="KOSPI")
+def _fetch(day: str) -> pd.DataFrame:
+    df_sector = stock.get_market_sector_classifications(day, market="KOSPI")
+    df_fund = stock.get_market_fundamental(day, market="KOSPI")
 
-    df = df_sector[["종목명", "업종명", "시가총액"]].join(
-        df_fund[["PER", "PBR", "EPS", "BPS"]], how="inner"
+    df = pd.merge(
+        df_sector.rename_axis("티커").reset_index()[["티커", "종목명", "업종명", "시가총액"]],
+        df_fund.rename_axis("티커").reset_index()[["티커", "PER", "PBR", "EPS", "BPS"]],
+        on="티커",
+        how="inner",
+        validate="one_to_one",
     )
     df = df.rename(columns={"업종명": "섹터"})
-    df["시가총액(억)"] = (df["시가총액"] / 1e8).round(0).astype(int)
-    df = df.drop(columns=["시가총액"])
-    df.index.name = "티커"
-    return df.reset_index()
+    df["섹터"] = df["섹터"].astype("category")
+    mc = df["시가총액"].to_numpy(dtype=np.int64)
+    df["시가총액(억)"] = ((mc + 50_000_000) // 100_000_000).astype(np.int32)
+    # Integer columns fit in 32 bits; PER/PBR stay float64 so values serialize exactly
+    df = df.astype({"EPS": "int32", "BPS": "int32"})
+    return df.drop(columns=["시가총액"])
+
+
+def _load(day: str) -> pd.DataFrame:
+    """Return data for day from the on-disk cache, fetching and saving it on a miss."""
+    path = os.path.join(CACHE_DIR, f"kospi_{day}.parquet")
+    if os.path.exists(path):
+        print(f"Loading KOSPI data for {day} from {path}...")
+        try:
+            df = pd.read_parquet(path)
+            if not df.empty:
+                return df
+        except Exception as e:
+            print(f"Ignoring unreadable cache file {path}: {e}")
+
+    print(f"Fetching KOSPI data for {day}...")
+    df = _fetch(day)
+    if df.empty:
+        raise ValueError(f"KRX returned no KOSPI data for {day}")
+    try:
+        _save(df, path)
+    except OSError as e:
+        print(f"Could not write cache file {path}: {e}")
+    return df
+
+
+def _save(df: pd.DataFrame, path: str) -> None:
+    """Write df to path atomically, then remove older daily cache files."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temp file first so a crash or a concurrent writer never leaves a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    for name in os.listdir(CACHE_DIR):
+        old_path = os.path.join(CACHE_DIR, name)
+        if name.startswith("kospi_") and name.endswith(".parquet") and old_path != path:
+            os.remove(old_path)
+
+
+def _filter_sector(df: pd.DataFrame, sector: str) -> pd.DataFrame:
+    """Rows whose sector contains the lowercased query; all rows for an empty query."""
+    if not sector:
+        return df
+    # Match against the few dozen sector categories, then mask rows by integer code
+    cat = df["섹터"].cat
+    codes = [i for i, c in enumerate(cat.categories) if sector in c.lower()]
+    row_codes = cat.codes.to_numpy()
+    if len(codes) == 1:
+        mask = row_codes == codes[0]
+    else:
+        mask = np.isin(row_codes, codes)
+    return df[mask]
 
 
 def _get_data() -> pd.DataFrame:
-    if _cache.is_stale():
-        _cache.refresh()
+    if _cache.df is None:
+        # Nothing to serve yet, so the first load has to block (once)
+        with _cache._lock:
+            if _cache.df is None:
+                _cache.refresh()
+    elif _cache.is_stale():
+        _cache.refresh_in_background()
     return _cache.df
 
 
+def _seconds_until_next_publish() -> float:
+    """Seconds until PUBLISH_HOUR KST on the next business day."""
+    now = datetime.now(KST)
+    run = now.replace(hour=PUBLISH_HOUR, minute=0, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(days=1)
+    while run.weekday() >= 5:
+        run += timedelta(days=1)
+    return (run - now).total_seconds()
+
+
+async def _refresh_daily() -> None:
+    """Refresh the cache once each business day's data is published, so requests never have to."""
+    while True:
+        await asyncio.sleep(_seconds_until_next_publish())
+        # Same guard as the request path, so the two never fetch concurrently
+        if _cache.claim_refresh(backoff=False):
+            await asyncio.to_thread(_cache.run_claimed_refresh)
+
+
 # ── App lifecycle ─────────────────────────────────────────────────────────────
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Preload on startup so the first request is instant
     _cache.refresh()
+    task = asyncio.create_task(_refresh_daily())
     yield
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
 
 
-app = FastAPI(title="KOSPI Fundamentals API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="KOSPI Fundamentals API",
+    version="1.0.0",
+    lifespan=lifespan,
+)
 
 # Allow all origins in development.
 # In production, replace "*" with your WordPress domain, e.g.:
@@ -94,6 +288,7 @@ app.add_middleware(
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
+
 @app.get("/api/health")
 def health():
     return {"status": "ok", "cached_date": _cache.date}
@@ -101,9 +296,8 @@ def health():
 
 @app.get("/api/sectors")
 def get_sectors():
-    df = _get_data()
-    sectors = sorted(df["섹터"].dropna().unique().tolist())
-    return {"sectors": sectors}
+    _get_data()
+    return {"sectors": _cache.sectors}
 
 
 @app.get("/api/fundamentals")
@@ -111,27 +305,26 @@ def get_fundamentals(
     sector: str | None = Query(None, description="Filter by sector name (partial match)"),
     limit: int = Query(1000, ge=1, le=2000, description="Max number of rows to return"),
 ):
-    df = _get_data()
-    df = df[(df["PER"] > 0) & (df["PBR"] > 0)].copy()
+    _get_data()
+    needle = (sector or "").strip().lower()
 
-    if sector:
-        df = df[df["섹터"].str.contains(sector, case=False, na=False)]
-        if df.empty:
+    def build(day: str, df_valid: pd.DataFrame) -> bytes:
+        df = _filter_sector(df_valid, needle)
+        if sector and df.empty:
             raise HTTPException(
                 status_code=404,
                 detail=f"No stocks found for sector '{sector}'"
             )
 
-    # Return by market cap descending as default order
-    df = df.sort_values("시가총액(억)", ascending=False).head(limit)
-    df = df.reset_index(drop=True)
-    df.index += 1
+        df = df.head(limit)
+        # orjson is several times faster than the stdlib json FastAPI falls back to
+        return orjson.dumps(
+            {"date": day, "total": len(df), "data": df.to_dict(orient="records")},
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
 
-    return {
-        "date": _cache.date,
-        "total": len(df),
-        "data": df.to_dict(orient="records"),
-    }
+    payload = _cache.cached_payload((needle, limit), build)
+    return Response(payload, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -6,13 +6,13 @@ breaking pykrx and all libraries that relied on that API. This script uses
 NAVER Finance instead, which provides the same data without authentication.
 """
 
-import json
 import os
 import sys
 import time
 from datetime import datetime
 from io import StringIO
 
+import orjson
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
@@ -105,6 +105,29 @@ def fetch_sectors(session):
     return ticker_to_sector
 
 
+def _json_default(obj):
+    # Missing values in nullable integer columns (EPS/BPS)
+    if obj is pd.NA:
+        return None
+    raise TypeError
+
+
+def write_json(path, date, df):
+    """Stream df to path as {"date", "total", "data": [...]}, one record per line."""
+    columns = list(df.columns)
+    with open(path, "wb") as f:
+        f.write(b'{"date":' + orjson.dumps(date) + b',"total":' + orjson.dumps(len(df)) + b',"data":[\n')
+        for i, row in enumerate(df.itertuples(index=False, name=None)):
+            if i:
+                f.write(b",\n")
+            f.write(orjson.dumps(
+                dict(zip(columns, row)),
+                option=orjson.OPT_SERIALIZE_NUMPY,
+                default=_json_default,
+            ))
+        f.write(b"\n]}\n")
+
+
 def main():
     today = datetime.today().strftime("%Y%m%d")
     print(f"Fetching KOSPI data for {today} from NAVER Finance...")
@@ -160,21 +183,14 @@ def main():
         sys.exit(1)
 
     # Finalize types
-    df["시가총액(억)"] = df["시가총액(억)"].round(0).astype(int)
-    df["EPS"] = df["EPS"].round(0).astype("Int64")
-    df["BPS"] = df["BPS"].round(0).astype("Int64")
+    df["시가총액(억)"] = df["시가총액(억)"].round(0).astype("int32")
+    df["EPS"] = df["EPS"].round(0).astype("Int32")
+    df["BPS"] = df["BPS"].round(0).astype("Int32")
 
     out_df = df[["티커", "종목명", "섹터", "시가총액(억)", "PER", "PBR", "EPS", "BPS"]]
 
-    output = {
-        "date": today,
-        "total": len(out_df),
-        "data": out_df.to_dict(orient="records"),
-    }
-
     os.makedirs("docs", exist_ok=True)
-    with open("docs/kospi.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    write_json("docs/kospi.json", today, out_df)
 
     print(f"Saved {len(out_df)} stocks to docs/kospi.json")
 
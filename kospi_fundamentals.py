@@ -15,6 +15,7 @@ import argparse
 import sys
 from datetime import datetime, timedelta
 
+import numpy as np
 import pandas as pd
 from pykrx import stock
 from tabulate import tabulate
@@ -53,16 +54,22 @@ def load_data(date: str) -> pd.DataFrame:
         print("Error: no data returned.")
         sys.exit(1)
 
-    # Merge on ticker index
-    df = df_sector[["종목명", "업종명", "시가총액"]].join(df_fund[["PER", "PBR", "EPS", "BPS"]], how="inner")
+    # Merge on ticker; validate guards against duplicate tickers silently multiplying rows
+    df = pd.merge(
+        df_sector.rename_axis("티커").reset_index()[["티커", "종목명", "업종명", "시가총액"]],
+        df_fund.rename_axis("티커").reset_index()[["티커", "PER", "PBR", "EPS", "BPS"]],
+        on="티커",
+        how="inner",
+        validate="one_to_one",
+    )
     df = df.rename(columns={"업종명": "섹터"})
 
     # Convert 시가총액 to 억원 for readability
-    df["시가총액(억)"] = (df["시가총액"] / 1e8).round(0).astype(int)
-    df = df.drop(columns=["시가총액"])
-
-    df.index.name = "티커"
-    return df.reset_index()
+    mc = df["시가총액"].to_numpy(dtype=np.int64)
+    df["시가총액(억)"] = ((mc + 50_000_000) // 100_000_000).astype(np.int32)
+    # Integer columns fit in 32 bits; PER/PBR stay float64 so values serialize exactly
+    df = df.astype({"EPS": "int32", "BPS": "int32"})
+    return df.drop(columns=["시가총액"])
 
 
 def main():
@@ -95,7 +102,7 @@ def main():
     print(f"  {len(df)} stocks loaded.\n")
 
     # Drop stocks with no valid PER/PBR (loss-making or data unavailable)
-    df_valid = df[(df["PER"] > 0) & (df["PBR"] > 0)].copy()
+    df_valid = df[(df["PER"] > 0) & (df["PBR"] > 0)]
 
     # Sector filter
     if args.sector:
@@ -11,14 +11,85 @@ Examples:
 """
 
 import argparse
+import asyncio
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
+import httpx
+import orjson
 import pandas as pd
+import requests
 from pykrx import stock
+from pykrx.website import krx
+from pykrx.website.comm import webio
+from requests.adapters import HTTPAdapter
 from tabulate import tabulate
 
+KRX_JSON_URL = "https://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd"
+# Same headers pykrx sends; a KRX login session adds its cookies on top
+KRX_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Referer": "https://data.krx.co.kr/contents/MDC/MDI/outerLoader/index.cmd",
+    "X-Requested-With": "XMLHttpRequest",
+}
+# ETF portfolio deposit file (PDF) — the endpoint behind get_etf_portfolio_deposit_file
+PDF_BLD = "dbms/MDC/STAT/standard/MDCSTAT05001"
+# Attempts per ETF before it is reported as failed; waits 1s, 2s, ... between tries
+FETCH_ATTEMPTS = 3
+
+# Timeout (seconds) for pykrx requests once they go through the shared session
+KRX_TIMEOUT = 30
+
+_shared_session: requests.Session | None = None
+
+
+def _krx_auth_session():
+    """pykrx's logged-in KRX session (pykrx >= 1.2.9 with KRX_ID/KRX_PW set), or None."""
+    get_auth_session = getattr(webio, "get_session", None)
+    return get_auth_session() if get_auth_session else None
+
+
+def _krx_headers() -> dict:
+    """Headers for direct KRX requests, carrying the login cookies when pykrx has a session."""
+    krxs = _krx_auth_session()
+    if krxs is None:
+        return dict(KRX_HEADERS)
+    auth_headers = {k: v for k, v in krxs.get_headers().items() if v}
+    return {**KRX_HEADERS, **auth_headers}
+
+
+def _krx_session(reader) -> tuple[requests.Session, dict]:
+    """Pick the session and headers for a pykrx request: its KRX login session if any, else ours."""
+    krxs = _krx_auth_session()
+    if krxs is None:
+        return _shared_session, reader.headers
+    return krxs.session, {**krxs.get_headers(), **reader.headers}
+
+
+def _get_read(self, **params):
+    session, headers = _krx_session(self)
+    return session.get(self.url, headers=headers, params=params, timeout=KRX_TIMEOUT)
+
+
+def _post_read(self, **params):
+    session, headers = _krx_session(self)
+    return session.post(self.url, headers=headers, data=params, timeout=KRX_TIMEOUT)
+
+
+def use_shared_session() -> None:
+    """
+    Make pykrx reuse one pooled session with a timeout instead of opening a new
+    connection per call. Patches pykrx process-wide, so only the CLI entry point calls it.
+    """
+    global _shared_session
+    if _shared_session is not None:
+        return
+    _shared_session = requests.Session()
+    for prefix in ("http://", "https://"):
+        _shared_session.mount(prefix, HTTPAdapter(pool_connections=50, pool_maxsize=200, max_retries=3))
+    webio.Get.read = _get_read
+    webio.Post.read = _post_read
+
 
 def get_latest_business_day() -> str:
     """Return the most recent business day as YYYYMMDD string."""
@@ -29,6 +100,17 @@ def get_latest_business_day() -> str:
     return date.strftime("%Y%m%d")
 
 
+# Ticker -> name map per reference date, so repeated lookups skip the fetch
+_ticker_names: dict[str, pd.Series] = {}
+
+
+def get_ticker_names(date: str) -> pd.Series:
+    """Return names of all KRX stocks indexed by ticker, from one batched KRX call."""
+    if date not in _ticker_names:
+        _ticker_names[date] = krx.get_market_ticker_and_name(date, market="ALL")
+    return _ticker_names[date]
+
+
 def resolve_ticker(query: str, date: str) -> tuple[str, str]:
     """
     Given a stock name or ticker, return (ticker, name).
@@ -44,61 +126,146 @@ def resolve_ticker(query: str, date: str) -> tuple[str, str]:
             sys.exit(1)
 
     # Otherwise search by name across all tickers
-    tickers = stock.get_market_ticker_list(date, market="ALL")
-    for ticker in tickers:
-        name = stock.get_market_ticker_name(ticker)
-        if query in name:
-            return ticker, name
+    names = get_ticker_names(date)
+    hits = names[names.str.contains(query, regex=False, na=False)]
+    if not hits.empty:
+        return hits.index[0], hits.iloc[0]
 
     print(f"Error: could not find a stock matching '{query}'.")
     sys.exit(1)
 
 
-def fetch_single_etf(etf_ticker: str, target_ticker: str, target_name: str, date: str) -> dict | None:
-    """Fetch portfolio for one ETF and return a result dict if target stock is found."""
+def _short_code(code: str | None) -> str:
+    """KRX mixes 12-char ISINs and 6-char short codes in COMPST_ISU_CD; normalize like pykrx."""
+    code = code or ""
+    return code[3:9] if len(code) > 6 else code
+
+
+def _portfolio_rows(content: bytes) -> list[dict]:
+    """Decode a PDF response; raise ValueError unless it is JSON with an "output" list."""
     try:
-        portfolio = stock.get_etf_portfolio_deposit_file(etf_ticker, date)
-        if portfolio is None or portfolio.empty:
-            return None
-        if target_ticker in portfolio.index:
-            row = portfolio.loc[target_ticker]
-            weight = float(row.get("비중", 0))
-            etf_name = stock.get_etf_ticker_name(etf_ticker)
-            return {
-                "ETF 티커": etf_ticker,
-                "ETF 명": etf_name,
-                f"{target_name} 비중 (%)": weight,
-            }
-    except Exception:
-        pass
-    return None
-
-
-def fetch_etf_exposure(target_ticker: str, target_name: str, date: str, workers: int = 20) -> pd.DataFrame:
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # KRX answers "LOGOUT" or an HTML error page when the request isn't authorized
+        raise ValueError(f"unexpected KRX response: {content[:40]!r}") from None
+    if not isinstance(data, dict) or not isinstance(data.get("output"), list):
+        raise ValueError(f"unexpected KRX response: {content[:40]!r}")
+    return data["output"]
+
+
+def _parse_weight(value: str | None) -> float:
+    """Parse a KRX weight such as "1,234.56"; "-" or empty means 0, as pykrx does."""
+    value = (value or "").replace(",", "").strip()
+    if value in ("", "-"):
+        return 0.0
+    return float(value)
+
+
+async def fetch_single_etf_async(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    etf_ticker: str,
+    etf_isin: str,
+    etf_name: str,
+    target_ticker: str,
+    target_name: str,
+    date: str,
+) -> dict | None:
     """
-    Scan all KRX ETFs in parallel and return a DataFrame of ETFs
-    that hold the target stock, sorted by weight descending.
+    Fetch portfolio for one ETF and return a result dict if target stock is found.
+    Retries HTTP errors (timeouts, rate limiting) and raises if the portfolio can't be read,
+    including when KRX answers with something other than portfolio JSON.
     """
-    etf_tickers = stock.get_etf_ticker_list(date)
-    total = len(etf_tickers)
-    print(f"Found {total} ETFs. Scanning portfolios with {workers} parallel workers...\n")
+    for attempt in range(FETCH_ATTEMPTS):
+        try:
+            async with semaphore:
+                resp = await client.post(KRX_JSON_URL, data={"bld": PDF_BLD, "trdDd": date, "isuCd": etf_isin})
+            resp.raise_for_status()
+            break
+        except httpx.HTTPError:
+            if attempt == FETCH_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+    rows = _portfolio_rows(resp.content)
+    row = next((r for r in rows if _short_code(r.get("COMPST_ISU_CD")) == target_ticker), None)
+    if row is None:
+        return None
+    weight = _parse_weight(row.get("COMPST_RTO"))
+    return {
+        "ETF 티커": etf_ticker,
+        "ETF 명": etf_name,
+        f"{target_name} 비중 (%)": weight,
+    }
 
+
+async def _scan_etfs(
+    etf_isins: dict[str, str],
+    etf_names: dict[str, str],
+    target_ticker: str,
+    target_name: str,
+    date: str,
+    concurrency: int,
+) -> tuple[list[dict], dict[str, str]]:
+    """
+    Scan every ETF portfolio on one event loop, bounded by a semaphore.
+    Returns (results, {ticker: error} for ETFs whose portfolio could not be read).
+    """
+    total = len(etf_isins)
     results = []
+    failed = {}
     completed = 0
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {
-            executor.submit(fetch_single_etf, t, target_ticker, target_name, date): t
-            for t in etf_tickers
-        }
-        for future in as_completed(futures):
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(headers=_krx_headers(), limits=limits, timeout=KRX_TIMEOUT) as client:
+
+        async def scan(etf_ticker: str, etf_isin: str) -> tuple[str, dict | None, str | None]:
+            try:
+                result = await fetch_single_etf_async(
+                    client, semaphore, etf_ticker, etf_isin, etf_names[etf_ticker],
+                    target_ticker, target_name, date,
+                )
+                return etf_ticker, result, None
+            except Exception as e:
+                return etf_ticker, None, str(e) or type(e).__name__
+
+        for coro in asyncio.as_completed([scan(t, isin) for t, isin in etf_isins.items()]):
             completed += 1
-            print(f"\r[{completed}/{total}] Scanning...", end="", flush=True)
-            result = future.result()
-            if result:
+            if completed % 50 == 0 or completed == total:
+                print(f"\r[{completed}/{total}] Scanning...", end="", flush=True)
+            etf_ticker, result, error = await coro
+            if error is not None:
+                failed[etf_ticker] = error
+            elif result:
                 results.append(result)
 
     print()  # newline after progress
+    return results, failed
+
+
+def fetch_etf_exposure(target_ticker: str, target_name: str, date: str, concurrency: int = 100) -> pd.DataFrame:
+    """
+    Scan all KRX ETFs concurrently and return a DataFrame of ETFs
+    that hold the target stock, sorted by weight descending.
+    """
+    etf_tickers = stock.get_etf_ticker_list(date)
+    total = len(etf_tickers)
+    print(f"Found {total} ETFs. Scanning portfolios with {concurrency} concurrent requests...\n")
+
+    # ISINs (the PDF endpoint's key) and names are in-memory lookups on the ETF list
+    # loaded above; resolve them here so the scan itself only awaits KRX responses
+    etf_isins = {t: stock.get_etf_isin(t) for t in etf_tickers}
+    etf_names = {t: stock.get_etf_ticker_name(t) for t in etf_tickers}
+    results, failed = asyncio.run(
+        _scan_etfs(etf_isins, etf_names, target_ticker, target_name, date, concurrency)
+    )
+    if failed:
+        shown = ", ".join(sorted(failed)[:10]) + (", ..." if len(failed) > 10 else "")
+        print(f"Warning: {len(failed)}/{total} ETF portfolios could not be read; results are incomplete.")
+        print(f"  Failed: {shown}")
+        print(f"  First error: {next(iter(failed.values()))}")
+
     df = pd.DataFrame(results)
     if not df.empty:
         df = df.sort_values(f"{target_name} 비중 (%)", ascending=False).reset_index(drop=True)
@@ -114,6 +281,7 @@ def main():
     parser.add_argument("--output", default=None, help="Save results to this CSV file")
     args = parser.parse_args()
 
+    use_shared_session()
     date = args.date or get_latest_business_day()
     print(f"Reference date: {date}")
 